@@ -2,15 +2,36 @@
 Чанкер: разбивает текст на чанки по количеству символов с сохранением целых предложений.
 """
 
+import array
+import hashlib
+import json
 import re
+from collections import deque
+from pathlib import Path
 
+# Кеш чанковки: корпус статичный, поэтому при переиндексации не
+# пересчитываем разбиение неизменившихся документов. Ключ — sha256
+# от содержимого, метаданных и параметров чанковки.
+CHUNK_CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "chunks" / ".cache"
 
-def split_into_sentences(text: str) -> list[str]:
-    """Разбивает текст на предложения."""
-    # Разделяем по точке, восклицательному, вопросительному знаку
-    # Не разбиваем по точке внутри сокращений (д.ф.-м.н., к.ф.-м.н., им., и т.д.)
-    sentences = re.split(r'(?<=[.!?])\s+(?=[А-ЯA-Z\d«\"(])', text)
-    return [s.strip() for s in sentences if s.strip()]
+# Разделяем по точке, восклицательному, вопросительному знаку
+# Не разбиваем по точке внутри сокращений (д.ф.-м.н., к.ф.-м.н., им., и т.д.)
+# Компилируем один раз на модуль — split_into_sentences вызывается
+# на каждый документ, и поиск паттерна в кеше re на каждый вызов не бесплатен.
+_SENT_SPLIT = re.compile(r'(?<=[.!?])\s+(?=[А-ЯA-Z\d«\"(])')
+
+
+def split_into_sentences(text: str, pre_stripped: bool = False) -> list[str]:
+    """
+    Разбивает текст на предложения.
+
+    pre_stripped=True — обещание вызывающего, что у text нет краевых
+    пробелов: разделитель между предложениями съедается самим split-ом,
+    поэтому пострипывать каждое предложение тогда не нужно.
+    """
+    if pre_stripped:
+        return _SENT_SPLIT.split(text) if text else []
+    return [s for s in (x.strip() for x in _SENT_SPLIT.split(text)) if s]
 
 
 def merge_short_chunks(chunks: list[str], min_chunk_size: int = 80) -> list[str]:
@@ -24,6 +45,7 @@ def merge_short_chunks(chunks: list[str], min_chunk_size: int = 80) -> list[str]
         return chunks
 
     merged = []
+    merged_append = merged.append  # без поиска атрибута на каждой итерации
     carry = ""  # буфер для коротких чанков, ожидающих склейки
 
     for chunk in chunks:
@@ -35,7 +57,7 @@ def merge_short_chunks(chunks: list[str], min_chunk_size: int = 80) -> list[str]
             # Слишком короткий — попробуем склеить со следующим
             carry = chunk
         else:
-            merged.append(chunk)
+            merged_append(chunk)
 
     # Если последний чанк был коротким, приклеиваем к предыдущему
     if carry:
@@ -52,6 +74,7 @@ def chunk_text(
     chunk_size: int = 500,
     chunk_overlap: int = 50,
     min_chunk_size: int = 80,
+    pre_stripped: bool = False,
 ) -> list[str]:
     """
     Разбивает текст на чанки по количеству символов с сохранением целых предложений.
@@ -63,53 +86,59 @@ def chunk_text(
                        Берутся последние предложения предыдущего чанка,
                        чтобы не терять контекст на стыке.
         min_chunk_size: Минимальный размер чанка. Более короткие склеиваются с соседними.
+        pre_stripped: Текст гарантированно без краевых пробелов —
+                      пропускаем strip каждого предложения.
 
     Returns:
         Список строк — чанков.
     """
-    sentences = split_into_sentences(text)
+    sentences = split_into_sentences(text, pre_stripped=pre_stripped)
 
     if not sentences:
         return []
 
     chunks = []
-    current_chunk_sentences = []
+    chunks_append = chunks.append  # горячий цикл: метод ищем один раз
+    # Храним пары (предложение, длина): длина каждого предложения
+    # измеряется один раз, а не пересчитывается при формировании overlap
+    current: deque = deque()
     current_length = 0
 
     for sentence in sentences:
         sentence_len = len(sentence)
 
         # Если одно предложение длиннее chunk_size — берём его целиком как отдельный чанк
-        if sentence_len > chunk_size and not current_chunk_sentences:
-            chunks.append(sentence)
+        if sentence_len > chunk_size and not current:
+            chunks_append(sentence)
             continue
 
         # Если добавление предложения превысит лимит — закрываем текущий чанк
-        if current_length + sentence_len > chunk_size and current_chunk_sentences:
-            chunk_text_str = ' '.join(current_chunk_sentences)
-            chunks.append(chunk_text_str)
+        if current_length + sentence_len > chunk_size and current:
+            chunks_append(' '.join(s for s, _ in current))
 
-            # Формируем overlap: берём последние предложения, пока не наберём chunk_overlap символов
-            overlap_sentences = []
+            # Формируем overlap: снимаем предложения с хвоста,
+            # пока не наберём chunk_overlap символов
+            overlap: deque = deque()
             overlap_len = 0
-            for s in reversed(current_chunk_sentences):
-                if overlap_len + len(s) > chunk_overlap:
+            while current:
+                _, tail_len = current[-1]
+                if overlap_len + tail_len > chunk_overlap:
                     break
-                overlap_sentences.insert(0, s)
-                overlap_len += len(s)
+                overlap.appendleft(current.pop())
+                overlap_len += tail_len
 
-            current_chunk_sentences = overlap_sentences
+            current = overlap
             current_length = overlap_len
 
-        current_chunk_sentences.append(sentence)
+        current.append((sentence, sentence_len))
         current_length += sentence_len
 
     # Последний чанк
-    if current_chunk_sentences:
-        chunk_text_str = ' '.join(current_chunk_sentences)
+    if current:
+        chunk_text_str = ' '.join(s for s, _ in current)
         # Не добавляем, если он полностью совпадает с предыдущим (из-за overlap)
         if not chunks or chunk_text_str != chunks[-1]:
-            chunks.append(chunk_text_str)
+            chunks_append(chunk_text_str)
 
     # Пост-обработка: склеиваем слишком короткие чанки
     chunks = merge_short_chunks(chunks, min_chunk_size)
@@ -117,42 +146,159 @@ def chunk_text(
     return chunks
 
 
-def chunk_document(
+def _chunk_cache_key(
+    doc: dict,
+    content: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    category: str,
+) -> str:
+    """Хеш по содержимому и всему, что попадает в chunk_id/metadata."""
+    h = hashlib.sha256()
+    for part in (
+        doc.get('url', ''),
+        doc.get('title', ''),
+        category,
+        f'{chunk_size}:{chunk_overlap}',
+        content,
+    ):
+        h.update(part.encode())
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+def _empty_columns() -> dict:
+    """Пустой набор колонок чанков (см. chunk_document_columns)."""
+    return {
+        'chunk_id': [],
+        'text': [],
+        'source_url': [],
+        'title': [],
+        'category': [],
+        'chunk_index': array.array('I'),
+        'total_chunks': array.array('I'),
+    }
+
+
+def chunk_document_columns(
     doc: dict,
     chunk_size: int = 500,
     chunk_overlap: int = 50,
     category: str = 'general',
-) -> list[dict]:
+    use_cache: bool = True,
+    pre_stripped: bool = False,
+) -> dict:
     """
-    Чанкует один документ (JSON из data/cleaned/) и возвращает список чанков с метаданными.
+    Чанкует один документ (JSON из data/cleaned/) в колоночном (SoA) виде.
+
+    Вместо списка вложенных словарей — один словарь параллельных колонок:
+    на корпус это одна структура на документ вместо ~5 словарей на чанк,
+    а повторяющиеся url/title/category хранятся ссылками на одну строку.
+    Числовые колонки (chunk_index, total_chunks) — компактные array('I').
 
     Args:
         doc: Словарь с полями url, title, content.
         chunk_size: Размер чанка.
         chunk_overlap: Перекрытие.
         category: Категория документа (main, news, people).
+        use_cache: Брать результат из дискового кеша, если документ
+                   не менялся с прошлой индексации.
+        pre_stripped: content гарантированно без краевых пробелов
+                      (cleaner стрипует на выходе) — не копируем строку
+                      лишним strip-ом и не стрипуем предложения.
 
     Returns:
-        Список словарей-чанков.
+        Словарь колонок: chunk_id, text, source_url, title, category,
+        chunk_index, total_chunks — все одной длины (число чанков).
     """
-    content = doc.get('content', '').strip()
+    content = doc.get('content', '')
+    if not pre_stripped:
+        content = content.strip()
     if not content:
-        return []
+        return _empty_columns()
+
+    cache_path = None
+    if use_cache:
+        key = _chunk_cache_key(doc, content, chunk_size, chunk_overlap, category)
+        cache_path = CHUNK_CACHE_DIR / f'{key}.json'
+        if cache_path.exists():
+            with open(cache_path, encoding='utf-8') as f:
+                cached = json.load(f)
+            # Кеш старого (строчного) формата молча перечанкуем заново
+            if isinstance(cached, dict):
+                cached['chunk_index'] = array.array('I', cached['chunk_index'])
+                cached['total_chunks'] = array.array('I', cached['total_chunks'])
+                return cached
+
+    text_chunks = chunk_text(content, chunk_size, chunk_overlap, pre_stripped=True)
+    n = len(text_chunks)
+    id_title = doc.get('title', 'unknown')
+
+    columns = {
+        'chunk_id': [f'{category}_{id_title}_{i}' for i in range(n)],
+        'text': text_chunks,
+        'source_url': [doc.get('url', '')] * n,
+        'title': [doc.get('title', '')] * n,
+        'category': [category] * n,
+        'chunk_index': array.array('I', range(n)),
+        'total_chunks': array.array('I', [n]) * n,
+    }
+
+    if cache_path is not None:
+        CHUNK_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        serializable = {
+            k: (v.tolist() if isinstance(v, array.array) else v)
+            for k, v in columns.items()
+        }
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(serializable, f, ensure_ascii=False)
+
+    return columns
+
+
+def chunk_document(
+    doc: dict,
+    chunk_size: int = 500,
+    chunk_overlap: int = 50,
+    category: str = 'general',
+    use_cache: bool = True,
+    pre_stripped: bool = False,
+) -> list[dict]:
+    """
+    Чанкует один документ и возвращает список чанков с метаданными.
 
-    text_chunks = chunk_text(content, chunk_size, chunk_overlap)
+    Тонкая обёртка над chunk_document_columns для кода, которому удобнее
+    строчный формат (список словарей).
 
-    result = []
-    for i, chunk in enumerate(text_chunks):
-        result.append({
-            'chunk_id': f'{category}_{doc.get("title", "unknown")}_{i}',
-            'text': chunk,
+    Args:
+        doc: Словарь с полями url, title, content.
+        chunk_size: Размер чанка.
+        chunk_overlap: Перекрытие.
+        category: Категория документа (main, news, people).
+        use_cache: Брать результат из дискового кеша, если документ
+                   не менялся с прошлой индексации.
+
+    Returns:
+        Список словарей-чанков.
+    """
+    cols = chunk_document_columns(
+        doc, chunk_size, chunk_overlap, category, use_cache, pre_stripped,
+    )
+    return [
+        {
+            'chunk_id': cid,
+            'text': text,
             'metadata': {
-                'source_url': doc.get('url', ''),
-                'title': doc.get('title', ''),
-                'category': category,
-                'chunk_index': i,
-                'total_chunks': len(text_chunks),
+                'source_url': url,
+                'title': title,
+                'category': cat,
+                'chunk_index': idx,
+                'total_chunks': total,
             }
-        })
-
-    return result
+        }
+        for cid, text, url, title, cat, idx, total in zip(
+            cols['chunk_id'], cols['text'], cols['source_url'],
+            cols['title'], cols['category'],
+            cols['chunk_index'], cols['total_chunks'],
+        )
+    ]
@@ -3,10 +3,23 @@ Embedder: обёртка над sentence-transformers для получения
 Работает на CPU, использует мультиязычную MiniLM модель.
 """
 
-from sentence_transformers import SentenceTransformer
+import os
+from collections import OrderedDict
+
 import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+
+from rag.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_DIMENSION,
+    EMBEDDING_MODEL_NAME,
+    ONNX_INT8_MODEL_DIR,
+)
 
-from rag.config import EMBEDDING_MODEL_NAME, EMBEDDING_DIMENSION
+# Сколько эмбеддингов запросов держать в LRU-кеше: повторный вопрос
+# не гоняет forward pass модели (~50мс на CPU) заново
+QUERY_CACHE_SIZE = 2048
 
 
 class Embedder:
@@ -17,46 +30,137 @@ class Embedder:
         embedder = Embedder()
         vector = embedder.embed("Какой-то текст")           # один вектор
         vectors = embedder.embed_batch(["текст1", "текст2"]) # батч
+
+    backend="onnx"      — инференс через ONNX Runtime (быстрее на CPU)
+    backend="onnx-int8" — ONNX + динамическое int8-квантование: вдвое
+                          меньше байт через память и int8-матмулы (VNNI),
+                          2-4x быстрее на CPU. Квантованная модель
+                          экспортируется один раз и кешируется на диске.
     """
 
-    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME):
-        print(f"Загрузка модели: {model_name} ...")
-        self.model = SentenceTransformer(model_name)
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        backend: str = EMBEDDING_BACKEND,
+    ):
+        # Потоки под CPU-инференс: физические ядра (без гипертредов)
+        # на вычисления, один interop-поток — межоперационный параллелизм
+        # при больших батчах только мешает
+        torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # уже настроено (повторная инициализация в том же процессе)
+
+        print(f"Загрузка модели: {model_name} (backend={backend}) ...")
+        if backend == "onnx-int8":
+            self.model = self._load_onnx_int8(model_name)
+        elif backend == "onnx":
+            self.model = self._load_backend(model_name, "onnx")
+        else:
+            self.model = SentenceTransformer(model_name)
         self.dimension = EMBEDDING_DIMENSION
+        # LRU-кеш эмбеддингов одиночных текстов (запросов пользователей)
+        self._query_cache: OrderedDict = OrderedDict()
         print(f"Модель загружена. Размерность вектора: {self.dimension}")
 
+    @staticmethod
+    def _load_backend(model_name: str, backend: str) -> SentenceTransformer:
+        """Загрузка с альтернативным бэкендом, fallback на torch."""
+        try:
+            return SentenceTransformer(model_name, backend=backend)
+        except Exception as e:
+            print(f"[WARNING] Бэкенд '{backend}' недоступен ({e}), использую torch")
+            return SentenceTransformer(model_name)
+
+    @staticmethod
+    def _load_onnx_int8(model_name: str) -> SentenceTransformer:
+        """
+        ONNX + динамическое int8-квантование (avx512_vnni).
+        При первом вызове экспортирует квантованную модель в
+        ONNX_INT8_MODEL_DIR, дальше грузит уже готовую с диска.
+        """
+        quant_file = "onnx/model_qint8_avx512_vnni.onnx"
+        try:
+            if not (ONNX_INT8_MODEL_DIR / quant_file).exists():
+                from sentence_transformers import (
+                    export_dynamic_quantized_onnx_model,
+                )
+                print("Экспорт int8-квантованной ONNX модели (однократно)...")
+                model = SentenceTransformer(model_name, backend="onnx")
+                ONNX_INT8_MODEL_DIR.mkdir(parents=True, exist_ok=True)
+                model.save(str(ONNX_INT8_MODEL_DIR))
+                export_dynamic_quantized_onnx_model(
+                    model, "avx512_vnni", str(ONNX_INT8_MODEL_DIR)
+                )
+            return SentenceTransformer(
+                str(ONNX_INT8_MODEL_DIR),
+                backend="onnx",
+                model_kwargs={"file_name": quant_file},
+            )
+        except Exception as e:
+            print(f"[WARNING] int8-квантование недоступно ({e}), использую torch")
+            return SentenceTransformer(model_name)
+
     def embed(self, text: str) -> np.ndarray:
         """
         Получить эмбеддинг одного текста.
 
+        Результат кешируется (LRU на QUERY_CACHE_SIZE записей): повторные
+        одинаковые запросы возвращаются без инференса модели.
+
         Args:
             text: Входной текст.
 
         Returns:
             numpy-массив размером (dimension,).
         """
-        return self.model.encode(text, normalize_embeddings=True)
+        cached = self._query_cache.get(text)
+        if cached is not None:
+            self._query_cache.move_to_end(text)
+            return cached
+
+        vector = self.model.encode(text, normalize_embeddings=True)
+
+        self._query_cache[text] = vector
+        if len(self._query_cache) > QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+        return vector
 
     def embed_batch(
         self,
         texts: list[str],
-        batch_size: int = 64,
+        batch_size: int = 256,
         show_progress: bool = True,
     ) -> np.ndarray:
         """
         Получить эмбеддинги для списка текстов.
 
+        Тексты внутри encode сортируются по длине, и каждый мини-батч
+        паддится до своего максимума (не до глобального): батчи выходят
+        однородными по длине, паддинг-оверхед минимален, а результат
+        возвращается в исходном порядке.
+
         Args:
             texts: Список строк.
-            batch_size: Размер батча (для CPU 64 — хороший баланс скорости и памяти).
+            batch_size: Размер батча (256 лучше заполняет BLAS-геммы
+                        при индексации на CPU).
             show_progress: Показывать прогресс-бар.
 
         Returns:
             numpy-массив размером (len(texts), dimension).
         """
-        return self.model.encode(
+        embeddings = self.model.encode(
             texts,
             batch_size=batch_size,
-            normalize_embeddings=True,
+            convert_to_numpy=True,
+            normalize_embeddings=False,
             show_progress_bar=show_progress,
         )
+
+        # L2-нормализация одним векторизованным numpy-вызовом
+        # вместо torch-ядра нормализации на каждый батч
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        np.maximum(norms, 1e-12, out=norms)
+        embeddings /= norms
+        return embeddings
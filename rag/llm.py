@@ -6,9 +6,13 @@ LLM: обёртка над OpenRouter API для генерации ответо
 Включает автоматический ретрай при rate-limit (429).
 """
 
+import asyncio
+import hashlib
 import time
+from collections import OrderedDict
 
-from openai import OpenAI, RateLimitError
+import httpx
+from openai import AsyncOpenAI, OpenAI, RateLimitError
 
 from rag.config import (
     OPENROUTER_API_KEY,
@@ -23,6 +27,34 @@ from rag.config import (
 MAX_RETRIES = 3
 RETRY_BASE_DELAY = 2.0
 
+# Сколько ответов держать в кеше (см. cache_responses в конструкторе)
+RESPONSE_CACHE_SIZE = 512
+
+# Коалесинг стриминга: копим токены и отдаём пачкой, когда накопилось
+# STREAM_FLUSH_CHARS символов или прошло STREAM_FLUSH_INTERVAL секунд.
+# Потребитель (Telegram-бот, SSE) делает в разы меньше операций,
+# а воспринимаемая задержка не растёт.
+STREAM_FLUSH_INTERVAL = 0.08
+STREAM_FLUSH_CHARS = 64
+
+# HTTP-клиент под OpenRouter: держим keep-alive соединения между
+# запросами (без повторного TCP/TLS handshake) и включаем HTTP/2 —
+# мультиплексирование заметно помогает при параллельных стримах.
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=40)
+_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+
+def _http2_available() -> bool:
+    """HTTP/2 в httpx требует пакет h2 (extra httpx[http2])."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+_HTTP2 = _http2_available()
+
 
 class LLM:
     """
@@ -45,12 +77,18 @@ class LLM:
         temperature: float = LLM_TEMPERATURE,
         max_tokens: int = LLM_MAX_TOKENS,
         system_prompt: str = SYSTEM_PROMPT,
+        cache_responses: bool = True,
     ):
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.system_prompt = system_prompt
 
+        # Кеш ответов: повторный вопрос с тем же контекстом не ходит в сеть.
+        # Отключайте (cache_responses=False), если нужна вариативность генерации.
+        self.cache_responses = cache_responses
+        self._response_cache: OrderedDict = OrderedDict()
+
         key = api_key or OPENROUTER_API_KEY
         if not key:
             raise ValueError(
@@ -61,9 +99,32 @@ class LLM:
         self.client = OpenAI(
             api_key=key,
             base_url=base_url,
+            http_client=httpx.Client(
+                http2=_HTTP2,
+                limits=_HTTP_LIMITS,
+                timeout=_HTTP_TIMEOUT,
+            ),
         )
+        # Async-клиент создаётся лениво — нужен только ask_stream_async
+        self._api_key = key
+        self._base_url = base_url
+        self._async_client: AsyncOpenAI | None = None
         print(f"LLM инициализирован: {self.model}")
 
+    def _get_async_client(self) -> AsyncOpenAI:
+        """Ленивая инициализация async-клиента (для конкурентных запросов)."""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=self._api_key,
+                base_url=self._base_url,
+                http_client=httpx.AsyncClient(
+                    http2=_HTTP2,
+                    limits=_HTTP_LIMITS,
+                    timeout=_HTTP_TIMEOUT,
+                ),
+            )
+        return self._async_client
+
     def _build_messages(
         self,
         question: str,
@@ -92,6 +153,25 @@ class LLM:
         messages.append({"role": "user", "content": user_message})
         return messages
 
+    def _cache_key(
+        self,
+        question: str,
+        context: str,
+        history: list[dict] | None,
+    ) -> str:
+        """Хеш-ключ кеша по всему, что влияет на ответ."""
+        h = hashlib.blake2b(digest_size=16)
+        for part in (self.model, self.system_prompt, question, context):
+            h.update(part.encode())
+            h.update(b"\x00")
+        if history:
+            for msg in history:
+                h.update(msg.get("role", "").encode())
+                h.update(b"\x00")
+                h.update(msg.get("content", "").encode())
+                h.update(b"\x00")
+        return h.hexdigest()
+
     def ask(
         self,
         question: str,
@@ -110,6 +190,14 @@ class LLM:
         Returns:
             Ответ модели (строка).
         """
+        key = None
+        if self.cache_responses:
+            key = self._cache_key(question, context, history)
+            cached = self._response_cache.get(key)
+            if cached is not None:
+                self._response_cache.move_to_end(key)
+                return cached
+
         messages = self._build_messages(question, context, history)
 
         for attempt in range(MAX_RETRIES + 1):
@@ -120,7 +208,14 @@ class LLM:
                     temperature=self.temperature,
                     max_tokens=self.max_tokens,
                 )
-                return response.choices[0].message.content.strip()
+                answer = response.choices[0].message.content.strip()
+
+                if key is not None:
+                    self._response_cache[key] = answer
+                    if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+                        self._response_cache.popitem(last=False)
+
+                return answer
 
             except RateLimitError as e:
                 if attempt < MAX_RETRIES:
@@ -149,7 +244,7 @@ class LLM:
             history: Опциональная история диалога.
 
         Yields:
-            Строковые токены по мере генерации.
+            Строки — склеенные пачки токенов (см. STREAM_FLUSH_*).
         """
         messages = self._build_messages(question, context, history)
 
@@ -163,10 +258,27 @@ class LLM:
                     stream=True,
                 )
 
+                buffer: list[str] = []
+                buffered_len = 0
+                last_flush = time.monotonic()
+
                 for chunk in stream:
                     delta = chunk.choices[0].delta
-                    if delta.content:
-                        yield delta.content
+                    if not delta.content:
+                        continue
+                    buffer.append(delta.content)
+                    buffered_len += len(delta.content)
+
+                    now = time.monotonic()
+                    if (buffered_len >= STREAM_FLUSH_CHARS
+                            or now - last_flush >= STREAM_FLUSH_INTERVAL):
+                        yield ''.join(buffer)
+                        buffer.clear()
+                        buffered_len = 0
+                        last_flush = now
+
+                if buffer:
+                    yield ''.join(buffer)
                 return  # Успешно отстримили — выходим
 
             except RateLimitError as e:
@@ -179,3 +291,69 @@ class LLM:
                         f"LLM недоступна после {MAX_RETRIES} попыток (rate limit). "
                         f"Попробуйте позже."
                     ) from e
+
+    async def ask_stream_async(
+        self,
+        question: str,
+        context: str,
+        history: list[dict] | None = None,
+    ):
+        """
+        Асинхронный стриминг через AsyncOpenAI — несколько одновременных
+        пользователей разделяют один event loop вместо потока на запрос.
+        Токены коалесируются так же, как в ask_stream.
+
+        Args:
+            question: Вопрос пользователя.
+            context: Контекст из ретривера.
+            history: Опциональная история диалога.
+
+        Yields:
+            Строки — склеенные пачки токенов.
+        """
+        messages = self._build_messages(question, context, history)
+        client = self._get_async_client()
+
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                stream = await client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    stream=True,
+                )
+
+                buffer: list[str] = []
+                buffered_len = 0
+                last_flush = time.monotonic()
+
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta
+                    if not delta.content:
+                        continue
+                    buffer.append(delta.content)
+                    buffered_len += len(delta.content)
+
+                    now = time.monotonic()
+                    if (buffered_len >= STREAM_FLUSH_CHARS
+                            or now - last_flush >= STREAM_FLUSH_INTERVAL):
+                        yield ''.join(buffer)
+                        buffer.clear()
+                        buffered_len = 0
+                        last_flush = now
+
+                if buffer:
+                    yield ''.join(buffer)
+                return
+
+            except RateLimitError as e:
+                if attempt < MAX_RETRIES:
+                    delay = RETRY_BASE_DELAY * (2 ** attempt)
+                    print(f"[LLM] Rate limit (429), ретрай через {delay:.0f}с... (попытка {attempt + 1}/{MAX_RETRIES})")
+                    await asyncio.sleep(delay)
+                else:
+                    raise RuntimeError(
+                        f"LLM недоступна после {MAX_RETRIES} попыток (rate limit). "
+                        f"Попробуйте позже."
+                    ) from e
@@ -89,7 +89,8 @@ class RAGPipeline:
 
         Yields:
             Кортежи (token: str, sources: list | None).
-            sources передаётся только в первом yield, потом None.
+            Первый yield — ("", docs): только источники, без токена.
+            Дальше — (token, None) на каждый токен ответа.
         """
         # 1. Поиск
         docs = self.retriever.search(query=question, top_k=top_k, category=category)
@@ -97,10 +98,32 @@ class RAGPipeline:
         # 2. Контекст
         context = self.retriever.format_context(docs)
 
-        # 3. Стриминг ответа
-        first = True
+        # 3. Стриминг ответа. Источники уходят отдельным нулевым кадром
+        # сразу после поиска: потребитель может показать их, не дожидаясь
+        # первого токена LLM, и не тащит тяжёлый список docs в каждом кадре
+        yield "", docs
         for token in self.llm.ask_stream(question=question, context=context):
-            if first:
-                yield token, docs
-                first = True
             yield token, None
+
+
+# ── Общий инстанс на процесс ─────────────────────────────────────────
+
+_pipeline: RAGPipeline | None = None
+
+
+def get_pipeline() -> RAGPipeline:
+    """
+    Lazy-инициализация общего RAGPipeline (синглтон на процесс).
+
+    Retriever и LLM тяжёлые: модель эмбеддингов, BM25-индекс, клиенты.
+    Сервис и бот берут один общий инстанс отсюда, а не строят свой.
+    Для multi-process серверов (gunicorn) инициализацию стоит делать
+    в мастере через --preload: модель и индекс форкаются в воркеры
+    copy-on-write — без лишней RAM и прогрева на каждый воркер.
+    Свои разделяемые Embedder/QdrantClient можно по-прежнему
+    передать через RAGPipeline(retriever=Retriever(embedder=..., client=...)).
+    """
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = RAGPipeline()
+    return _pipeline
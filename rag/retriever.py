@@ -9,25 +9,116 @@ Retriever: гибридный поиск (semantic + BM25) с возвратом
 """
 
 import json
-import math
+import pickle
 import re
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from pathlib import Path
 
 import numpy as np
 from rank_bm25 import BM25Okapi
 from qdrant_client import QdrantClient
-from qdrant_client.models import FieldCondition, Filter, MatchValue
+
+# bm25s хранит вклад каждого терма в готовых sparse-матрицах и делает
+# top-k отбор скомпилированным кодом (numba) — на порядки быстрее
+# питоновского цикла get_scores из rank_bm25. Опционален: без него
+# работаем через rank_bm25.
+try:
+    import bm25s
+except ImportError:
+    bm25s = None
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    MatchText,
+    MatchValue,
+    QueryRequest,
+)
 
 from rag.config import (
     COLLECTION_NAME,
+    DOC_TEXTS_DB_PATH,
     DOC_TEXTS_PATH,
+    KEYWORD_TOP_K,
     QDRANT_HOST,
     QDRANT_PORT,
+    QDRANT_SERVER_HYBRID,
+    RERANK_MAX_TEXT_CHARS,
+    RERANK_OVERSAMPLE,
+    RERANKER_ENABLED,
+    RERANKER_MODEL,
     SEMANTIC_TOP_K,
     TOP_K,
 )
 from rag.embedder import Embedder
 
+# Токенизация BM25: {2,} в паттерне заменяет пост-фильтр len(t) >= 2,
+# а таблица translate опускает регистр одним C-проходом (lower идёт
+# через общий юникодный путь). Символы вне класса паттерн всё равно
+# отбрасывает, так что таблицы латиница+кириллица достаточно.
+_TOKEN_RE = re.compile(r"[а-яёa-z0-9]{2,}")
+
+# LRU-кеш эмбеддингов запросов на уровне ретривера. В отличие от кеша
+# в Embedder ключ нормализован (strip + lower), поэтому «Кто декан?» и
+# «кто декан? » попадают в одну запись.
+EMBED_CACHE_SIZE = 4096
+
+# LRU-кеш результатов bm25_search: один и тот же запрос в рамках сессии
+# приходит повторно (ретраи, пагинация), а хиты — маленькие словари
+# с URL и скором, кешировать их дёшево. Ключ — (запрос, top_k, категория).
+BM25_QUERY_CACHE_SIZE = 2048
+_LOWER_TABLE = str.maketrans(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZАБВГДЕЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯЁ",
+    "abcdefghijklmnopqrstuvwxyzабвгдежзийклмнопрстуфхцчшщъыьэюяё",
+)
+
+
+class _EagerBM25:
+    """
+    Предвычисленный BM25-скорер поверх rank_bm25 (fallback-путь без bm25s).
+
+    get_scores у BM25Okapi на каждый запрос заново считает формулу BM25
+    по всем документам в питоновском цикле по термам. Здесь вся
+    query-независимая часть — idf[t] * tf*(k1+1) / (tf + k1*(1-b+b*dl/avgdl)) —
+    считается один раз при построении и складывается в постинги:
+    term -> (индексы документов, готовые вклады в скор). Запрос — это
+    несколько векторных сложений numpy вместо цикла по корпусу.
+    """
+
+    def __init__(self, bm25: BM25Okapi):
+        self._num_docs = bm25.corpus_size
+        k1, b = bm25.k1, bm25.b
+        doc_len = np.asarray(bm25.doc_len, dtype=np.float64)
+        denom = k1 * (1 - b + b * doc_len / bm25.avgdl)
+
+        postings: dict[str, tuple[list, list]] = {}
+        for i, freqs in enumerate(bm25.doc_freqs):
+            for term, tf in freqs.items():
+                score = bm25.idf.get(term) or 0.0
+                score *= tf * (k1 + 1) / (tf + denom[i])
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = ([], [])
+                entry[0].append(i)
+                entry[1].append(score)
+
+        self._postings = {
+            term: (np.asarray(idx, dtype=np.int32), np.asarray(sc, dtype=np.float64))
+            for term, (idx, sc) in postings.items()
+        }
+
+    def get_scores(self, tokens: list[str]) -> np.ndarray:
+        """Скоры BM25 для всех документов (идентичны BM25Okapi.get_scores)."""
+        scores = np.zeros(self._num_docs, dtype=np.float64)
+        postings = self._postings
+        for token in tokens:
+            entry = postings.get(token)
+            if entry is not None:
+                scores[entry[0]] += entry[1]
+        return scores
+
 
 @dataclass
 class RetrievedDocument:
@@ -64,30 +155,185 @@ class Retriever:
         client: QdrantClient | None = None,
         collection_name: str = COLLECTION_NAME,
         doc_texts_path: str | None = None,
+        reranker=None,
     ):
         self.embedder = embedder or Embedder()
         self.client = client or QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
         self.collection_name = collection_name
-
-        # Загрузка полных текстов документов
+        self._embed_cache: OrderedDict = OrderedDict()
+        # Две ветки поиска в search независимы: semantic ждёт сеть
+        # (Qdrant), BM25 считает на CPU — гоняем их параллельно
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        self._server_hybrid = QDRANT_SERVER_HYBRID
+
+        # Cross-encoder для переранжирования (см. RERANKER_ENABLED).
+        # Можно передать готовый инстанс — удобно для тестов
+        self.reranker = reranker
+        if self.reranker is None and RERANKER_ENABLED:
+            from sentence_transformers import CrossEncoder
+            print(f"Загрузка reranker-модели: {RERANKER_MODEL} ...")
+            self.reranker = CrossEncoder(RERANKER_MODEL)
+
+        # Полные тексты документов. Основной путь — SQLite-база из
+        # 04_embed_and_index: в RAM живут только метаданные (title,
+        # category), а full_text читается лениво для top-k победителей
+        # (_get_full_doc). Fallback — старый doc_texts.json целиком в RAM,
+        # если база ещё не построена.
         path = doc_texts_path or str(DOC_TEXTS_PATH)
-        with open(path, encoding="utf-8") as f:
-            self.doc_texts: dict = json.load(f)
-        print(f"Загружено {len(self.doc_texts)} полных документов")
+        db_path = (
+            Path(doc_texts_path).with_suffix(".sqlite")
+            if doc_texts_path
+            else DOC_TEXTS_DB_PATH
+        )
+        self._db: sqlite3.Connection | None = None
+        self.doc_texts: dict = {}
+        if db_path.exists():
+            # Только чтение — serialized-режим sqlite безопасен для
+            # конкурентных SELECT из нескольких потоков
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            rows = self._db.execute(
+                "SELECT url, title, category FROM docs ORDER BY rowid"
+            ).fetchall()
+            self.doc_meta: dict[str, dict] = {
+                url: {"title": title, "category": category}
+                for url, title, category in rows
+            }
+            bm25_source = db_path
+            print(f"Загружено {len(self.doc_meta)} документов (тексты лениво из {db_path.name})")
+        else:
+            with open(path, encoding="utf-8") as f:
+                self.doc_texts = json.load(f)
+            self.doc_meta = {
+                url: {
+                    "title": doc.get("title", ""),
+                    "category": doc.get("category", ""),
+                }
+                for url, doc in self.doc_texts.items()
+            }
+            bm25_source = Path(path)
+            print(f"Загружено {len(self.doc_texts)} полных документов")
+
+        # BM25-индекс по ПОЛНЫМ документам (не чанкам): BM25-ранг на
+        # уровне страниц — совпадает с гранулярностью возврата. Готовый
+        # индекс кешируется на диске (см. _load_bm25_cache), чтобы не
+        # перетокенизировать корпус на каждом старте процесса.
+        self.doc_urls: list[str] = list(self.doc_meta.keys())
+        # Категории как компактный int8-массив, выровненный с doc_urls:
+        # фильтр по категории в bm25_search — одна векторная маска
+        # вместо питоновского цикла с lookup по doc_meta на каждый хит
+        self._cat_to_id: dict[str, int] = {
+            cat: i
+            for i, cat in enumerate(sorted({m["category"] for m in self.doc_meta.values()}))
+        }
+        self.doc_category_ids = np.fromiter(
+            (self._cat_to_id[m["category"]] for m in self.doc_meta.values()),
+            dtype=np.int8,
+            count=len(self.doc_meta),
+        )
+        self._use_bm25s = bm25s is not None
+        self._bm25_cache_dir = Path(path).parent / ".cache"
+        self._bm25_query_cache: OrderedDict = OrderedDict()
+
+        if not self._load_bm25_cache(bm25_source):
+            self._build_bm25_index()
+
+    # ── Построение и дисковый кеш BM25-индекса ──────────────────────
 
-        # Строим BM25-индекс по ПОЛНЫМ документам (не чанкам).
-        # Так BM25-ранг будет на уровне страниц — совпадает с гранулярностью возврата.
-        self.doc_urls: list[str] = []  # URL в том же порядке что и BM25-корпус
-        corpus_tokens: list[list[str]] = []
+    @staticmethod
+    def _bm25s_backend() -> str:
+        """numba-бэкенд bm25s, если numba установлена, иначе numpy."""
+        try:
+            import numba  # noqa: F401
+            return "numba"
+        except ImportError:
+            return "numpy"
+
+    def _warmup_bm25s(self) -> None:
+        """Прогрев: первый retrieve компилирует numba-ядра, не хотим
+        платить за это на первом запросе пользователя."""
+        try:
+            self.bm25.retrieve([["кафедра"]], k=1, show_progress=False)
+        except Exception:
+            pass
 
-        for url, doc in self.doc_texts.items():
-            # Токенизируем заголовок + текст для лучшего матча
-            combined = doc.get("title", "") + " " + doc.get("text", "")
-            corpus_tokens.append(self._tokenize(combined))
-            self.doc_urls.append(url)
+    def _load_bm25_cache(self, source: Path) -> bool:
+        """
+        Загружает BM25-индекс из дискового кеша.
 
-        self.bm25 = BM25Okapi(corpus_tokens)
-        print(f"BM25-индекс построен: {len(self.doc_urls)} документов")
+        Кеш валиден, только если он свежее файла с корпусом (doc_texts):
+        после переиндексации индекс перестроится сам. bm25s грузится с
+        mmap — массивы индекса живут в page cache и разделяются между
+        процессами-воркерами.
+        """
+        try:
+            source_mtime = source.stat().st_mtime
+        except OSError:
+            return False
+
+        if self._use_bm25s:
+            index_dir = self._bm25_cache_dir / "bm25s_index"
+            params = index_dir / "params.index.json"
+            if not params.exists() or params.stat().st_mtime < source_mtime:
+                return False
+            try:
+                self.bm25 = bm25s.BM25.load(str(index_dir), mmap=True)
+                self.bm25.backend = self._bm25s_backend()
+            except Exception as e:
+                print(f"[WARNING] BM25-кеш не загрузился ({e}), перестраиваю индекс")
+                return False
+            self._warmup_bm25s()
+            print(f"BM25-индекс (bm25s) загружен из кеша: {len(self.doc_urls)} документов")
+            return True
+
+        cache_path = self._bm25_cache_dir / "bm25_eager.pkl"
+        if not cache_path.exists() or cache_path.stat().st_mtime < source_mtime:
+            return False
+        try:
+            with open(cache_path, "rb") as f:
+                self.bm25 = pickle.load(f)
+        except Exception as e:
+            print(f"[WARNING] BM25-кеш не загрузился ({e}), перестраиваю индекс")
+            return False
+        print(f"BM25-индекс загружен из кеша: {len(self.doc_urls)} документов")
+        return True
+
+    def _build_bm25_index(self) -> None:
+        """Токенизирует корпус, строит индекс и сохраняет его в кеш."""
+        # Новый индекс — старые закешированные хиты невалидны
+        self._bm25_query_cache.clear()
+        corpus_tokens: list[list[str]] = []
+        for title, text in self._iter_docs_for_index():
+            # Токенизируем заголовок + текст для лучшего матча
+            corpus_tokens.append(self._tokenize(title + " " + text))
+
+        if self._use_bm25s:
+            backend = self._bm25s_backend()
+            # method="atire" ближе всего к масштабу скоров BM25Okapi из
+            # rank_bm25, но не совпадает с ним: на частотных термах idf
+            # считается иначе, поэтому сигмоидная нормализация в search
+            # может дать заметно другую величину, чем на fallback-пути.
+            # Порядок внутри BM25-ветки от этого не меняется
+            self.bm25 = bm25s.BM25(method="atire", backend=backend)
+            self.bm25.index(corpus_tokens, show_progress=False)
+            self._warmup_bm25s()
+            print(f"BM25-индекс (bm25s/{backend}) построен: {len(self.doc_urls)} документов")
+        else:
+            self.bm25 = _EagerBM25(BM25Okapi(corpus_tokens))
+            print(f"BM25-индекс построен: {len(self.doc_urls)} документов")
+
+        self._save_bm25_cache()
+
+    def _save_bm25_cache(self) -> None:
+        """Сохраняет индекс на диск; неудача — не повод падать."""
+        try:
+            self._bm25_cache_dir.mkdir(parents=True, exist_ok=True)
+            if self._use_bm25s:
+                self.bm25.save(str(self._bm25_cache_dir / "bm25s_index"))
+            else:
+                with open(self._bm25_cache_dir / "bm25_eager.pkl", "wb") as f:
+                    pickle.dump(self.bm25, f, protocol=5)
+        except Exception as e:
+            print(f"[WARNING] Не удалось сохранить BM25-кеш: {e}")
 
     @staticmethod
     def _tokenize(text: str) -> list[str]:
@@ -95,13 +341,44 @@ class Retriever:
         Простая токенизация для BM25: lowercase + разбивка по словам.
         Без стоп-слов — BM25 сам обработает частотные слова через IDF.
         """
-        text = text.lower()
-        tokens = re.findall(r"[а-яёa-z0-9]+", text)
-        return [t for t in tokens if len(t) >= 2]
+        return _TOKEN_RE.findall(text.translate(_LOWER_TABLE))
+
+    def _iter_docs_for_index(self):
+        """(title, text) по корпусу в порядке doc_urls — для токенизации."""
+        if self._db is not None:
+            yield from self._db.execute(
+                "SELECT title, text FROM docs ORDER BY rowid"
+            )
+        else:
+            for doc in self.doc_texts.values():
+                yield doc.get("title", ""), doc.get("text", "")
 
     def _get_full_doc(self, source_url: str) -> dict | None:
-        """Получает полный текст документа по URL."""
-        return self.doc_texts.get(source_url)
+        """Получает полный текст документа по URL (из SQLite — лениво)."""
+        if self._db is None:
+            return self.doc_texts.get(source_url)
+        row = self._db.execute(
+            "SELECT title, text, category FROM docs WHERE url = ?",
+            (source_url,),
+        ).fetchone()
+        if row is None:
+            return None
+        return {"title": row[0], "text": row[1], "category": row[2]}
+
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Эмбеддинг запроса с LRU-кешем по нормализованному тексту."""
+        key = query.strip().lower()
+        cached = self._embed_cache.get(key)
+        if cached is not None:
+            self._embed_cache.move_to_end(key)
+            return cached
+
+        vector = self.embedder.embed(query)
+
+        self._embed_cache[key] = vector
+        if len(self._embed_cache) > EMBED_CACHE_SIZE:
+            self._embed_cache.popitem(last=False)
+        return vector
 
     def semantic_search(
         self,
@@ -110,7 +387,7 @@ class Retriever:
         category: str | None = None,
     ) -> list[dict]:
         """Семантический поиск через Qdrant."""
-        query_vector = self.embedder.embed(query).tolist()
+        query_vector = self._embed_query(query).tolist()
 
         query_filter = None
         if category:
@@ -129,6 +406,11 @@ class Retriever:
             print(f"[WARNING] Qdrant недоступен, используем только BM25: {e}")
             return []
 
+        return self._points_to_hits(results.points)
+
+    @staticmethod
+    def _points_to_hits(points) -> list[dict]:
+        """Точки Qdrant → список хитов с payload-метаданными."""
         return [
             {
                 "source_url": p.payload.get("source_url", ""),
@@ -136,9 +418,63 @@ class Retriever:
                 "category": p.payload.get("category", ""),
                 "score": p.score,
             }
-            for p in results.points
+            for p in points
+        ]
+
+    def _server_hybrid_search(
+        self,
+        query: str,
+        category: str | None = None,
+    ) -> tuple[list[dict], list[dict]]:
+        """
+        Обе ветки поиска одним батч-RPC в Qdrant (QDRANT_SERVER_HYBRID).
+
+        Первый запрос — обычный dense-поиск, второй — dense-поиск,
+        ограниченный документами с лексическим совпадением (MatchText по
+        текстовому индексу, создан в 04_embed_and_index). Локальный
+        BM25-индекс не участвует; скоры обеих веток — cosine в [0, 1].
+
+        Returns:
+            (semantic_hits, keyword_hits) — как semantic_search/bm25_search.
+        """
+        query_vector = self._embed_query(query).tolist()
+
+        sem_must = []
+        kw_must = [FieldCondition(key="text", match=MatchText(text=query))]
+        if category:
+            cond = FieldCondition(key="category", match=MatchValue(value=category))
+            sem_must.append(cond)
+            kw_must.append(cond)
+
+        requests = [
+            QueryRequest(
+                query=query_vector,
+                filter=Filter(must=sem_must) if sem_must else None,
+                limit=SEMANTIC_TOP_K,
+                with_payload=True,
+            ),
+            QueryRequest(
+                query=query_vector,
+                filter=Filter(must=kw_must),
+                limit=KEYWORD_TOP_K,
+                with_payload=True,
+            ),
         ]
 
+        try:
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=requests,
+            )
+        except Exception as e:
+            print(f"[WARNING] Qdrant недоступен, результатов нет: {e}")
+            return [], []
+
+        return (
+            self._points_to_hits(responses[0].points),
+            self._points_to_hits(responses[1].points),
+        )
+
     def bm25_search(
         self,
         query: str,
@@ -150,30 +486,65 @@ class Retriever:
         if not tokens:
             return []
 
-        scores = self.bm25.get_scores(tokens)
-        top_indices = np.argsort(scores)[::-1]
+        # LRU-кеш готовых хитов: повторный запрос не гоняет скоринг заново
+        cache_key = (query.strip().lower(), top_k, category)
+        cached = self._bm25_query_cache.get(cache_key)
+        if cached is not None:
+            self._bm25_query_cache.move_to_end(cache_key)
+            return cached
+
+        cat_id = None
+        if category:
+            cat_id = self._cat_to_id.get(category)
+            if cat_id is None:
+                return []  # категории нет в корпусе — совпадений не будет
+
+        # Фильтрация делается ДО отбора (маска по категории), поэтому
+        # переизбор кандидатов не нужен: ровно top_k выживших за одну
+        # векторную операцию
+        if self._use_bm25s and cat_id is None:
+            # Без фильтра retrieve сам делает top-k отбор внутри
+            # (numba/numpy) — полный скоринг корпуса не нужен
+            k = min(top_k, len(self.doc_urls))
+            indices, scores_top = self.bm25.retrieve(
+                [tokens], k=k, show_progress=False,
+            )
+            top_indices = indices[0]
+            top_scores = scores_top[0]
+        else:
+            # Полный скоринг корпуса: get_scores есть и у bm25s, и у
+            # _EagerBM25. С фильтром по категории маскируем до отбора —
+            # top-k гарантированно набирается из нужной категории, а не
+            # из того, что уцелело бы в окне переизбора
+            scores = self.bm25.get_scores(tokens)
+            if cat_id is not None:
+                scores = np.where(self.doc_category_ids == cat_id, scores, -np.inf)
+            # Частичный отбор top-k за O(N) вместо полного argsort:
+            # сортируем только маленький срез кандидатов
+            k = min(top_k, len(scores))
+            if k <= 0:
+                return []
+            part = np.argpartition(-scores, k - 1)[:k]
+            top_indices = part[np.argsort(-scores[part])]
+            top_scores = scores[top_indices]
 
         hits = []
-        for idx in top_indices:
-            if scores[idx] <= 0:
-                break
-            if len(hits) >= top_k:
+        for idx, score in zip(top_indices.tolist(), top_scores.tolist()):
+            if score <= 0:  # отсекает и -inf замаскированных документов
                 break
 
             url = self.doc_urls[idx]
-            doc = self.doc_texts[url]
-            cat = doc.get("category", "")
-
-            if category and cat != category:
-                continue
-
+            meta = self.doc_meta[url]
             hits.append({
                 "source_url": url,
-                "title": doc.get("title", ""),
-                "category": cat,
-                "score": float(scores[idx]),
+                "title": meta["title"],
+                "category": meta["category"],
+                "score": score,
             })
 
+        self._bm25_query_cache[cache_key] = hits
+        if len(self._bm25_query_cache) > BM25_QUERY_CACHE_SIZE:
+            self._bm25_query_cache.popitem(last=False)
         return hits
 
     def search(
@@ -200,100 +571,210 @@ class Retriever:
         Returns:
             Список RetrievedDocument с полными текстами страниц.
         """
-        # 1. Два параллельных поиска
-        semantic_hits = self.semantic_search(query, category=category)
-        bm25_hits = self.bm25_search(query, category=category)
-
-        # 2. Собираем скоры по URL (дедупликация semantic — берём лучший скор)
-        semantic_scores: dict[str, float] = {}
-        for hit in semantic_hits:
-            url = hit["source_url"]
-            if url:
-                semantic_scores[url] = max(semantic_scores.get(url, 0), hit["score"])
-
-        bm25_scores: dict[str, float] = {}
-        for hit in bm25_hits:
-            url = hit["source_url"]
-            if url:
-                bm25_scores[url] = max(bm25_scores.get(url, 0), hit["score"])
-
-        # 3. Нормализация скоров в [0, 1]
-        #    Semantic: уже cosine similarity в [0, 1] — используем как есть
-        #    BM25: используем сигмоиду — sigmoid(x) = 1 / (1 + e^(-k*(x - x0)))
-        #    Это сохраняет абсолютное значение скора (19.3 >> 2.6).
-        def sigmoid_norm(scores: dict[str, float], k: float = 1.0, x0: float = 3.0) -> dict[str, float]:
-            return {url: 1.0 / (1.0 + math.exp(-k * (v - x0))) for url, v in scores.items()}
-
-        norm_sem = dict(semantic_scores)  # уже в [0, 1]
-        norm_bm25 = sigmoid_norm(bm25_scores)
-
-        # 4. Собираем метаданные
-        url_meta: dict[str, dict] = {}
-        for hit in semantic_hits + bm25_hits:
+        # 1. Две ветки поиска. Серверный гибрид — один батч-RPC в Qdrant;
+        #    иначе параллелим: semantic I/O-bound (RTT до Qdrant),
+        #    BM25 CPU-bound — latency = max, а не сумма
+        if self._server_hybrid:
+            semantic_hits, bm25_hits = self._server_hybrid_search(query, category=category)
+        else:
+            fut_sem = self._executor.submit(self.semantic_search, query, category=category)
+            fut_bm25 = self._executor.submit(self.bm25_search, query, category=category)
+            semantic_hits = fut_sem.result()
+            bm25_hits = fut_bm25.result()
+
+        return self._fuse(query, semantic_hits, bm25_hits, top_k, alpha)
+
+    def _fuse(
+        self,
+        query: str,
+        semantic_hits: list[dict],
+        bm25_hits: list[dict],
+        top_k: int,
+        alpha: float,
+    ) -> list[RetrievedDocument]:
+        """Слияние веток поиска в итоговый ранжированный список страниц."""
+        # 2. Один проход по хитам каждой ветки: скоры (дедупликация —
+        #    берём лучший скор ветки) и метаданные копятся в одном
+        #    словаре по URL — без отдельного прохода под метаданные
+        #    и без материализации set-объединения ключей
+        agg: dict[str, dict] = {}
+
+        def _entry(hit: dict) -> dict | None:
             url = hit["source_url"]
-            if url and url not in url_meta:
-                url_meta[url] = {
+            if not url:
+                return None
+            e = agg.get(url)
+            if e is None:
+                e = agg[url] = {
+                    "sem": 0.0,
+                    "bm25": 0.0,
+                    "in_sem": False,
+                    "in_bm25": False,
                     "title": hit["title"],
                     "category": hit["category"],
                 }
+            return e
+
+        for hit in semantic_hits:
+            e = _entry(hit)
+            if e is not None:
+                e["in_sem"] = True
+                if hit["score"] > e["sem"]:
+                    e["sem"] = hit["score"]
+
+        for hit in bm25_hits:
+            e = _entry(hit)
+            if e is not None:
+                e["in_bm25"] = True
+                if hit["score"] > e["bm25"]:
+                    e["bm25"] = hit["score"]
+
+        # 3. Нормализация и гибридный скор — векторизованно numpy,
+        #    вместо питоновского цикла по URL с math.exp на каждый.
+        #    Semantic: уже cosine similarity в [0, 1] — как есть.
+        #    BM25: сигмоида 1 / (1 + e^(-k*(x - x0))), k=1, x0=3 —
+        #    сохраняет абсолютное значение скора (19.3 >> 2.6).
+        urls = list(agg.keys())
+        n = len(urls)
+        if n == 0:
+            return []
+
+        entries = list(agg.values())
+        in_bm25 = np.fromiter((e["in_bm25"] for e in entries), dtype=bool, count=n)
+        in_sem = np.fromiter((e["in_sem"] for e in entries), dtype=bool, count=n)
+        bm = np.fromiter((e["bm25"] for e in entries), dtype=np.float64, count=n)
+        sm = np.fromiter((e["sem"] for e in entries), dtype=np.float64, count=n)
+
+        if self._server_hybrid:
+            # Лексическая ветка серверного гибрида — тоже cosine в [0, 1],
+            # сигмоидная калибровка под масштаб BM25 ей не нужна
+            bm_n = np.where(in_bm25, bm, 0.0)
+        else:
+            bm_n = np.where(in_bm25, 1.0 / (1.0 + np.exp(-(bm - 3.0))), 0.0)
 
-        # 5. Считаем гибридный скор
         #    hybrid = max(bm25, sem) + alpha * min(bm25, sem)
         #    Так один сильный сигнал (BM25=1.0 для «Гульнара») побеждает
         #    два средних (bm25=0.4 + sem=0.6).
         #    Бонус alpha за наличие второго сигнала.
-        all_urls = set(norm_sem.keys()) | set(norm_bm25.keys())
-        hybrid_results = []
-
-        for url in all_urls:
-            s_bm25 = norm_bm25.get(url, 0.0)
-            s_sem = norm_sem.get(url, 0.0)
-            hybrid_score = max(s_bm25, s_sem) + alpha * min(s_bm25, s_sem)
-
-            # Определяем тип матча
-            has_bm25 = url in bm25_scores
-            has_sem = url in semantic_scores
-            if has_bm25 and has_sem:
-                match_type = "hybrid"
-            elif has_bm25:
-                match_type = "bm25"
-            else:
-                match_type = "semantic"
-
-            hybrid_results.append({
-                "url": url,
-                "hybrid_score": hybrid_score,
-                "bm25_norm": s_bm25,
-                "sem_norm": s_sem,
-                "match_type": match_type,
-                **url_meta.get(url, {}),
-            })
+        hybrid = np.maximum(bm_n, sm) + alpha * np.minimum(bm_n, sm)
 
-        # 6. Сортируем по гибридному скору
-        hybrid_results.sort(key=lambda x: x["hybrid_score"], reverse=True)
+        # 4. top_k по гибридному скору: частичный отбор + сортировка
+        #    только выбранного среза; RetrievedDocument материализуем
+        #    только для победителей. С реранкером берём кандидатов
+        #    с запасом — финальный порядок решит cross-encoder
+        k = min(top_k * RERANK_OVERSAMPLE if self.reranker is not None else top_k, n)
+        part = np.argpartition(-hybrid, k - 1)[:k]
+        order = part[np.argsort(-hybrid[part])]
 
-        # 7. Берём top_k и формируем результаты с полными текстами
         results = []
-        for item in hybrid_results[:top_k]:
-            url = item["url"]
+        for i in order:
+            url = urls[i]
             doc = self._get_full_doc(url)
             full_text = doc["text"] if doc else "(полный текст недоступен)"
 
+            if in_bm25[i] and in_sem[i]:
+                match_type = "hybrid"
+            elif in_bm25[i]:
+                match_type = "bm25"
+            else:
+                match_type = "semantic"
+
+            meta = agg[url]
             results.append(
                 RetrievedDocument(
                     source_url=url,
-                    title=item.get("title", ""),
-                    category=item.get("category", ""),
+                    title=meta["title"],
+                    category=meta["category"],
                     full_text=full_text,
-                    score=item["hybrid_score"],
-                    bm25_norm=item["bm25_norm"],
-                    sem_norm=item["sem_norm"],
-                    match_type=item["match_type"],
+                    # Округление здесь, один раз: API-слой отдаёт скор
+                    # как есть, без round на каждый документ в запросе
+                    score=round(float(hybrid[i]), 4),
+                    bm25_norm=float(bm_n[i]),
+                    sem_norm=float(sm[i]),
+                    match_type=match_type,
                 )
             )
 
+        if self.reranker is not None and len(results) > 1:
+            results = self._rerank(query, results, top_k)
+
         return results
 
+    def search_batch(
+        self,
+        queries: list[str],
+        top_k: int = TOP_K,
+        category: str | None = None,
+        alpha: float = 0.5,
+    ) -> list[list[RetrievedDocument]]:
+        """
+        Гибридный поиск сразу для пачки запросов (бенчмарк, прогрев).
+
+        Эмбеддинги всех запросов считаются одним forward-pass модели,
+        семантическая ветка уходит одним батч-RPC (query_batch_points)
+        вместо RPC на запрос; BM25 гоняется по готовому индексу в цикле.
+        Слияние — то же, что в search.
+
+        Returns:
+            Список результатов per-запрос, в порядке queries.
+        """
+        if not queries:
+            return []
+
+        vectors = self.embedder.embed_batch(queries, show_progress=False)
+
+        query_filter = None
+        if category:
+            query_filter = Filter(
+                must=[FieldCondition(key="category", match=MatchValue(value=category))]
+            )
+        requests = [
+            QueryRequest(
+                query=vector.tolist(),
+                filter=query_filter,
+                limit=SEMANTIC_TOP_K,
+                with_payload=True,
+            )
+            for vector in vectors
+        ]
+
+        try:
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=requests,
+            )
+            semantic_lists = [self._points_to_hits(r.points) for r in responses]
+        except Exception as e:
+            print(f"[WARNING] Qdrant недоступен, используем только BM25: {e}")
+            semantic_lists = [[] for _ in queries]
+
+        bm25_lists = [self.bm25_search(q, category=category) for q in queries]
+
+        return [
+            self._fuse(query, sem, bm, top_k, alpha)
+            for query, sem, bm in zip(queries, semantic_lists, bm25_lists)
+        ]
+
+    def _rerank(
+        self,
+        query: str,
+        docs: list[RetrievedDocument],
+        top_k: int,
+    ) -> list[RetrievedDocument]:
+        """
+        Переранжирует кандидатов cross-encoder-ом и возвращает top_k.
+
+        Cross-encoder видит запрос и документ вместе, поэтому ранжирует
+        точнее bi-encoder-а; скоры в RetrievedDocument остаются
+        гибридными — меняется только порядок и отсечка.
+        """
+        pairs = [(query, doc.full_text[:RERANK_MAX_TEXT_CHARS]) for doc in docs]
+        ce_scores = self.reranker.predict(
+            pairs, batch_size=16, show_progress_bar=False,
+        )
+        order = np.argsort(-np.asarray(ce_scores))[:top_k]
+        return [docs[i] for i in order]
+
     def format_context(self, docs: list[RetrievedDocument]) -> str:
         """
         Форматирует найденные документы в контекст для LLM.
@@ -1,18 +1,25 @@
 """
-Скрипт чанковки: читает data/cleaned/, разбивает на чанки, сохраняет в data/chunks/chunks.json
+Скрипт чанковки: читает data/cleaned/, разбивает на чанки, сохраняет в data/chunks/chunks.jsonl
 """
 
 import json
 import os
 import sys
 
-from rag.chunker import chunk_document
+from rag.chunker import chunk_document_columns
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # fallback на stdlib json
 
 sys.stdout.reconfigure(encoding='utf-8')
 
 CLEANED_DIR = '../data/cleaned'
 CHUNKS_DIR = '../data/chunks'
-CHUNKS_FILE = os.path.join(CHUNKS_DIR, 'chunks.json')
+# JSONL: по чанку на строку — пишем потоково по мере обхода файлов,
+# в памяти не живёт ни общий список чанков, ни итоговый JSON-текст
+CHUNKS_FILE = os.path.join(CHUNKS_DIR, 'chunks.jsonl')
 
 # Параметры чанковки
 CHUNK_SIZE = 500
@@ -29,37 +36,60 @@ def detect_category(rel_path: str) -> str:
         return 'main'
 
 
-def main():
-    all_chunks = []
-    file_count = 0
-
-    for root, dirs, files in os.walk(CLEANED_DIR):
-        for filename in sorted(files):
-            if not filename.endswith('.json'):
-                continue
-
-            filepath = os.path.join(root, filename)
-            rel_path = os.path.relpath(filepath, CLEANED_DIR)
-            category = detect_category(rel_path)
-
-            with open(filepath, 'r', encoding='utf-8') as f:
-                doc = json.load(f)
+def dump_chunk(chunk: dict) -> bytes:
+    """Сериализует один чанк в строку JSONL."""
+    if orjson is not None:
+        return orjson.dumps(chunk) + b'\n'
+    return json.dumps(chunk, ensure_ascii=False).encode('utf-8') + b'\n'
 
-            chunks = chunk_document(doc, CHUNK_SIZE, CHUNK_OVERLAP, category)
-            all_chunks.extend(chunks)
-            file_count += 1
 
-            print(f'[{category:6}] {rel_path:<75} -> {len(chunks)} чанков')
+def main():
+    file_count = 0
+    chunk_count = 0
+    text_length = 0
 
-    # Сохраняем
     os.makedirs(CHUNKS_DIR, exist_ok=True)
-    with open(CHUNKS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(all_chunks, f, ensure_ascii=False, indent=2)
+    with open(CHUNKS_FILE, 'wb') as out:
+        for root, dirs, files in os.walk(CLEANED_DIR):
+            for filename in sorted(files):
+                if not filename.endswith('.json'):
+                    continue
+
+                filepath = os.path.join(root, filename)
+                rel_path = os.path.relpath(filepath, CLEANED_DIR)
+                category = detect_category(rel_path)
+
+                with open(filepath, 'rb') as f:
+                    raw = f.read()
+                doc = orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+                # pre_stripped: cleaner стрипует content на выходе
+                cols = chunk_document_columns(
+                    doc, CHUNK_SIZE, CHUNK_OVERLAP, category, pre_stripped=True,
+                )
+
+                for cid, text, url, title, cat, idx, total in zip(*cols.values()):
+                    out.write(dump_chunk({
+                        'chunk_id': cid,
+                        'text': text,
+                        'metadata': {
+                            'source_url': url,
+                            'title': title,
+                            'category': cat,
+                            'chunk_index': idx,
+                            'total_chunks': total,
+                        }
+                    }))
+                    text_length += len(text)
+
+                file_count += 1
+                chunk_count += len(cols['text'])
+                print(f'[{category:6}] {rel_path:<75} -> {len(cols["text"])} чанков')
 
     print(f'\n{"=" * 80}')
     print(f'Файлов обработано: {file_count}')
-    print(f'Всего чанков: {len(all_chunks)}')
-    print(f'Средний размер чанка: {sum(len(c["text"]) for c in all_chunks) / len(all_chunks):.0f} символов')
+    print(f'Всего чанков: {chunk_count}')
+    print(f'Средний размер чанка: {text_length / chunk_count:.0f} символов')
     print(f'Параметры: chunk_size={CHUNK_SIZE}, overlap={CHUNK_OVERLAP}')
     print(f'Сохранено в: {os.path.abspath(CHUNKS_FILE)}')
 
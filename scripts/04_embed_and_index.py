@@ -11,6 +11,7 @@
 
 import json
 import os
+import sqlite3
 import sys
 import time
 from pathlib import Path
@@ -22,30 +23,55 @@ sys.path.insert(0, str(PROJECT_ROOT))
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
     Distance,
-    PointStruct,
+    OptimizersConfigDiff,
     TextIndexParams,
     TokenizerType,
     VectorParams,
 )
 
 from rag.config import (
+    CHUNKS_JSONL_PATH,
+    CHUNKS_PATH,
     COLLECTION_NAME,
+    DOC_TEXTS_DB_PATH,
     DOC_TEXTS_PATH,
     EMBEDDING_DIMENSION,
     QDRANT_HOST,
+    QDRANT_GRPC_PORT,
     QDRANT_PORT,
 )
 from rag.embedder import Embedder
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # fallback на stdlib json
+
 # ── Пути ─────────────────────────────────────────────────────────────
-CHUNKS_PATH = PROJECT_ROOT / "data" / "chunks" / "chunks.json"
 CLEANED_DIR = PROJECT_ROOT / "data" / "cleaned"
 
+# Размер мини-батча эмбеддера: encode сортирует тексты по длине и
+# паддит каждый батч до своего максимума, так что батч почти не тратит
+# FLOPs на паддинг; размер влияет только на заполнение BLAS-гемм
+EMBED_BATCH_SIZE = 256
+
+
+def load_chunks(path: Path = CHUNKS_JSONL_PATH) -> list[dict]:
+    """
+    Загружает чанки: JSONL построчно (orjson, если установлен),
+    с fallback на legacy chunks.json, если JSONL ещё не сгенерирован.
+    """
+    if not path.exists() and path.suffix == ".jsonl":
+        path = CHUNKS_PATH
+
+    if path.suffix == ".jsonl":
+        loads = orjson.loads if orjson is not None else json.loads
+        with open(path, "rb") as f:
+            chunks = [loads(line) for line in f if line.strip()]
+    else:
+        with open(path, encoding="utf-8") as f:
+            chunks = json.load(f)
 
-def load_chunks(path: Path) -> list[dict]:
-    """Загружает чанки из JSON-файла."""
-    with open(path, encoding="utf-8") as f:
-        chunks = json.load(f)
     print(f"Загружено чанков: {len(chunks)}")
     return chunks
 
@@ -75,8 +101,9 @@ def build_doc_texts(cleaned_dir: Path, output_path: Path) -> dict:
             else:
                 category = "main"
 
-            with open(filepath, encoding="utf-8") as f:
-                doc = json.load(f)
+            with open(filepath, "rb") as f:
+                raw = f.read()
+            doc = orjson.loads(raw) if orjson is not None else json.loads(raw)
 
             url = doc.get("url", "")
             if not url:
@@ -90,14 +117,47 @@ def build_doc_texts(cleaned_dir: Path, output_path: Path) -> dict:
 
     # Сохраняем
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(doc_texts, f, ensure_ascii=False, indent=2)
+    if orjson is not None:
+        with open(output_path, "wb") as f:
+            f.write(orjson.dumps(doc_texts, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(doc_texts, f, ensure_ascii=False, indent=2)
+
+    # SQLite-хранилище для ленивого чтения full_text ретривером:
+    # в RAM у воркера остаются только метаданные, тексты читаются
+    # точечно для top-k победителей (страницы page cache — общие
+    # между процессами)
+    write_doc_texts_db(doc_texts, DOC_TEXTS_DB_PATH)
 
     print(f"Собрано документов: {len(doc_texts)}")
-    print(f"Сохранено в: {output_path}")
+    print(f"Сохранено в: {output_path} и {DOC_TEXTS_DB_PATH.name}")
     return doc_texts
 
 
+def write_doc_texts_db(doc_texts: dict, db_path: Path) -> None:
+    """Пересоздаёт SQLite-базу полных текстов (url → title/text/category)."""
+    if db_path.exists():
+        db_path.unlink()
+
+    con = sqlite3.connect(db_path)
+    try:
+        con.execute(
+            "CREATE TABLE docs "
+            "(url TEXT PRIMARY KEY, title TEXT, text TEXT, category TEXT)"
+        )
+        con.executemany(
+            "INSERT INTO docs VALUES (?, ?, ?, ?)",
+            (
+                (url, doc["title"], doc["text"], doc["category"])
+                for url, doc in doc_texts.items()
+            ),
+        )
+        con.commit()
+    finally:
+        con.close()
+
+
 def create_collection(client: QdrantClient, name: str, dimension: int) -> None:
     """
     Создаёт коллекцию в Qdrant + текстовый индекс для keyword-поиска.
@@ -113,6 +173,10 @@ def create_collection(client: QdrantClient, name: str, dimension: int) -> None:
             size=dimension,
             distance=Distance.COSINE,
         ),
+        # Отключаем построение HNSW на время bulk-загрузки: иначе индекс
+        # перестраивается на каждом батче. Включается обратно в main()
+        # после upload_points.
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=0),
     )
     print(f"Коллекция '{name}' создана (dim={dimension}, metric=Cosine)")
 
@@ -143,40 +207,45 @@ def create_collection(client: QdrantClient, name: str, dimension: int) -> None:
     print("Текстовый индекс на поле 'title' создан")
 
 
+def _chunk_payload(chunk: dict) -> dict:
+    """Payload точки Qdrant для одного чанка."""
+    meta = chunk["metadata"]
+    return {
+        "chunk_id": chunk["chunk_id"],
+        "text": chunk["text"],
+        "source_url": meta["source_url"],
+        "title": meta["title"],
+        "category": meta["category"],
+        "chunk_index": meta["chunk_index"],
+        "total_chunks": meta["total_chunks"],
+    }
+
+
 def upload_points(
     client: QdrantClient,
     collection_name: str,
     chunks: list[dict],
     embeddings,
-    batch_size: int = 100,
+    batch_size: int = 256,
+    parallel: int = 4,
 ) -> None:
-    """Загружает точки (вектор + payload) в Qdrant батчами."""
-    total = len(chunks)
-    for start in range(0, total, batch_size):
-        end = min(start + batch_size, total)
-        points = []
-
-        for i in range(start, end):
-            chunk = chunks[i]
-            payload = {
-                "chunk_id": chunk["chunk_id"],
-                "text": chunk["text"],
-                "source_url": chunk["metadata"]["source_url"],
-                "title": chunk["metadata"]["title"],
-                "category": chunk["metadata"]["category"],
-                "chunk_index": chunk["metadata"]["chunk_index"],
-                "total_chunks": chunk["metadata"]["total_chunks"],
-            }
-            points.append(
-                PointStruct(
-                    id=i,
-                    vector=embeddings[i].tolist(),
-                    payload=payload,
-                )
-            )
+    """
+    Загружает точки (вектор + payload) в Qdrant.
 
-        client.upsert(collection_name=collection_name, points=points)
-        print(f"  Загружено {end}/{total} точек")
+    upload_collection стримит батчи параллельными воркерами и по gRPC
+    использует бинарный протокол — вместо ручного цикла upsert с
+    JSON-сериализацией каждого батча.
+    """
+    client.upload_collection(
+        collection_name=collection_name,
+        vectors=embeddings,
+        payload=(_chunk_payload(chunk) for chunk in chunks),
+        ids=range(len(chunks)),
+        batch_size=batch_size,
+        parallel=parallel,
+        wait=True,
+    )
+    print(f"  Загружено {len(chunks)}/{len(chunks)} точек")
 
 
 def main():
@@ -190,14 +259,14 @@ def main():
     print(f"\n{'=' * 50}")
     print("Шаг 2. Загрузка чанков и вычисление эмбеддингов")
     print("=" * 50)
-    chunks = load_chunks(CHUNKS_PATH)
+    chunks = load_chunks()
     texts = [chunk["text"] for chunk in chunks]
 
     # 3. Вычисление эмбеддингов
     embedder = Embedder()
     print(f"\nВычисляю эмбеддинги для {len(texts)} чанков...")
     t0 = time.time()
-    embeddings = embedder.embed_batch(texts)
+    embeddings = embedder.embed_batch(texts, batch_size=EMBED_BATCH_SIZE)
     elapsed = time.time() - t0
     print(f"Эмбеддинги вычислены за {elapsed:.1f} сек")
     print(f"Размерность: {embeddings.shape}")
@@ -206,8 +275,13 @@ def main():
     print(f"\n{'=' * 50}")
     print("Шаг 3. Загрузка в Qdrant")
     print("=" * 50)
-    client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
-    print(f"Подключение к Qdrant ({QDRANT_HOST}:{QDRANT_PORT})...")
+    client = QdrantClient(
+        host=QDRANT_HOST,
+        port=QDRANT_PORT,
+        grpc_port=QDRANT_GRPC_PORT,
+        prefer_grpc=True,
+    )
+    print(f"Подключение к Qdrant ({QDRANT_HOST}:{QDRANT_PORT}, gRPC {QDRANT_GRPC_PORT})...")
     collections = client.get_collections()
     print(f"Qdrant доступен. Коллекции: {[c.name for c in collections.collections]}")
 
@@ -218,6 +292,12 @@ def main():
     print(f"\nЗагрузка {len(chunks)} точек...")
     upload_points(client, COLLECTION_NAME, chunks, embeddings)
 
+    # Включаем обратно построение HNSW (отложено на время загрузки)
+    client.update_collection(
+        collection_name=COLLECTION_NAME,
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=20000),
+    )
+
     # 7. Проверка
     info = client.get_collection(COLLECTION_NAME)
     print(f"\n{'=' * 50}")
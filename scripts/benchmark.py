@@ -5,18 +5,23 @@
 и проверяет, содержится ли ground-truth URL в top-K результатах.
 
 Использование:
-    python -m scripts.benchmark              # Top@5 (по умолчанию)
-    python -m scripts.benchmark --top_k 3    # Top@3
-    python -m scripts.benchmark --verbose     # подробный вывод
+    python -m scripts.benchmark                # Top@5 (по умолчанию)
+    python -m scripts.benchmark --top_k 3      # Top@3
+    python -m scripts.benchmark --sweep 1,3,5,10  # несколько K за один прогон
+    python -m scripts.benchmark --verbose      # подробный вывод
 """
 
 import argparse
+import io
 import sys
-import time
 from pathlib import Path
+from time import perf_counter_ns
 
-# UTF-8 для Windows
-sys.stdout.reconfigure(encoding="utf-8")
+# UTF-8 для Windows + полная буферизация: print не флашит на каждый
+# перенос строки, вывод уходит большими кусками на границах секций
+sys.stdout = io.TextIOWrapper(
+    sys.stdout.buffer, encoding="utf-8", write_through=False, line_buffering=False,
+)
 
 # Корень проекта
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -32,24 +37,26 @@ def parse_benchmark(filepath: Path) -> list[dict]:
     URL — последнее слово в строке (начинается с http).
     """
     questions = []
-    with open(filepath, encoding="utf-8") as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
-
-            # URL — последний токен, начинается с http
-            parts = line.rsplit(maxsplit=1)
-            if len(parts) != 2 or not parts[1].startswith("http"):
-                print(f"⚠ Строка {line_num}: не удалось распарсить — пропускаю")
-                continue
-
-            question, expected_url = parts
-            questions.append({
-                "id": line_num,
-                "question": question.strip(),
-                "expected_url": expected_url.strip(),
-            })
+    # Файл читается целиком и режется одним splitlines — без
+    # итератора файлового объекта с поиском переносов на каждой строке
+    lines = filepath.read_text(encoding="utf-8").splitlines()
+    for line_num, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        # URL — последний токен, начинается с http
+        parts = line.rsplit(maxsplit=1)
+        if len(parts) != 2 or not parts[1].startswith("http"):
+            print(f"⚠ Строка {line_num}: не удалось распарсить — пропускаю")
+            continue
+
+        question, expected_url = parts
+        questions.append({
+            "id": line_num,
+            "question": question.strip(),
+            "expected_url": expected_url.strip(),
+        })
 
     return questions
 
@@ -74,28 +81,44 @@ def run_benchmark(
     print(f"  BENCHMARK: Top@{top_k}")
     print(f"  Всего вопросов: {len(questions)}")
     print(f"{'=' * 70}\n")
+    sys.stdout.flush()
+
+    # Весь прогон — один батч: эмбеддинги всех вопросов одним
+    # forward-pass, семантика одним батч-RPC; цикл ниже — только учёт.
+    # Одинаковые вопросы (multi-answer кейсы) ищутся один раз —
+    # результаты разворачиваются обратно по строкам файла.
+    # perf_counter_ns — монотонный таймер максимального разрешения,
+    # в отличие от wall-clock time.time()
+    unique_questions = list(dict.fromkeys(q["question"] for q in questions))
+    start_ns = perf_counter_ns()
+    unique_results = retriever.search_batch(unique_questions, top_k=top_k)
+    batch_elapsed = (perf_counter_ns() - start_ns) / 1e9
+    by_question = dict(zip(unique_questions, unique_results))
+    all_results = [by_question[q["question"]] for q in questions]
+
+    elapsed = batch_elapsed / len(questions)  # среднее на вопрос
+    dedup_note = (
+        f", уникальных {len(unique_questions)}"
+        if len(unique_questions) < len(questions) else ""
+    )
+    print(f"  Батч выполнен за {batch_elapsed:.2f}s "
+          f"({elapsed:.3f}s/вопрос в среднем{dedup_note})\n")
 
-    for i, q in enumerate(questions, 1):
+    for i, (q, results) in enumerate(zip(questions, all_results), 1):
         question = q["question"]
         expected_url = q["expected_url"]
 
-        start_time = time.time()
-        results = retriever.search(query=question, top_k=top_k)
-        elapsed = time.time() - start_time
-
-        # Собираем URL из результатов
-        retrieved_urls = [doc.source_url for doc in results]
-
-        # Проверяем, есть ли ground-truth URL в top-K
-        found = expected_url in retrieved_urls
+        # URL → ранг: один проход по результатам, O(1) проверка
+        # ground-truth вместо пары линейных сканов (in + index)
+        url_rank = {doc.source_url: j + 1 for j, doc in enumerate(results)}
+        rank = url_rank.get(expected_url)
+        found = rank is not None
         if found:
             hits += 1
             status = "✅ HIT"
-            rank = retrieved_urls.index(expected_url) + 1
         else:
             misses += 1
             status = "❌ MISS"
-            rank = None
 
         details.append({
             "id": q["id"],
@@ -103,13 +126,13 @@ def run_benchmark(
             "expected_url": expected_url,
             "found": found,
             "rank": rank,
-            "retrieved_urls": retrieved_urls,
+            "retrieved_urls": list(url_rank),
             "elapsed": elapsed,
         })
 
         # Вывод
         rank_str = f" (rank={rank})" if rank else ""
-        print(f"  [{i:2d}/{len(questions)}] {status}{rank_str}  ({elapsed:.2f}s)")
+        print(f"  [{i:2d}/{len(questions)}] {status}{rank_str}")
         print(f"           Q: {question}")
         if verbose:
             print(f"           Expected: {expected_url}")
@@ -122,6 +145,7 @@ def run_benchmark(
                     f"{doc.source_url}"
                 )
         print()
+        sys.stdout.flush()  # конец блока вопроса — показываем прогресс
 
     total = len(questions)
     accuracy = hits / total if total > 0 else 0.0
@@ -155,6 +179,7 @@ def run_benchmark(
                 print(f"             {j}. {url}")
 
     print(f"{'=' * 70}\n")
+    sys.stdout.flush()
 
     return {
         "total": total,
@@ -165,6 +190,28 @@ def run_benchmark(
     }
 
 
+def print_sweep(results: dict, ks: list[int]) -> None:
+    """
+    Top@K для нескольких K из одного прогона.
+
+    Результаты top@max(K) — отсортированный список, поэтому «попал в
+    top-k» эквивалентно rank <= k: метрики для всех меньших K считаются
+    из уже собранных рангов, без повторных поисков.
+    """
+    total = results["total"]
+    print(f"{'=' * 70}")
+    print(f"  SWEEP (один прогон top@{max(ks)})")
+    print(f"{'=' * 70}")
+    for k in ks:
+        hits_k = sum(
+            1 for d in results["details"]
+            if d["rank"] is not None and d["rank"] <= k
+        )
+        print(f"  Top@{k}: {hits_k}/{total} ({hits_k / total:.1%})")
+    print(f"{'=' * 70}\n")
+    sys.stdout.flush()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Benchmark ретривера (Top@K)")
     parser.add_argument(
@@ -173,6 +220,13 @@ def main():
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Подробный вывод (показать все результаты)"
     )
+    parser.add_argument(
+        "--sweep",
+        type=str,
+        default=None,
+        help="Список K через запятую (напр. '1,3,5,10'): один прогон "
+             "с максимальным K, метрики для остальных — из рангов",
+    )
     parser.add_argument(
         "--benchmark_file",
         type=str,
@@ -199,12 +253,22 @@ def main():
     retriever = Retriever()
 
     # 3. Прогоняем бенчмарк
-    results = run_benchmark(
-        retriever=retriever,
-        questions=questions,
-        top_k=args.top_k,
-        verbose=args.verbose,
-    )
+    if args.sweep:
+        ks = sorted({int(k) for k in args.sweep.split(",") if k.strip()})
+        results = run_benchmark(
+            retriever=retriever,
+            questions=questions,
+            top_k=max(ks),
+            verbose=args.verbose,
+        )
+        print_sweep(results, ks)
+    else:
+        results = run_benchmark(
+            retriever=retriever,
+            questions=questions,
+            top_k=args.top_k,
+            verbose=args.verbose,
+        )
 
 
 if __name__ == "__main__":
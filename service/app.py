@@ -9,13 +9,30 @@ FastAPI приложение — ML-сервис для RAG-системы ка
     http://localhost:8000/redoc    — ReDoc
 """
 
+import asyncio
+import logging
 from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from service.routes import router, get_pipeline
 
+# Логирование через очередь: поток запроса только кладёт LogRecord,
+# а запись в stdout (блокирующий I/O под GIL) делает фоновый листенер
+_log_queue: SimpleQueue = SimpleQueue()
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+
+
+def _setup_logging() -> None:
+    root = logging.getLogger()
+    if not any(isinstance(h, QueueHandler) for h in root.handlers):
+        root.addHandler(QueueHandler(_log_queue))
+        root.setLevel(logging.INFO)
+        _log_listener.start()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -24,9 +41,17 @@ async def lifespan(app: FastAPI):
     загружает модели, подключается к Qdrant, прогревает pipeline.
     """
     print("🚀 Запуск сервиса...")
-    get_pipeline()  # Предварительная инициализация
+    _setup_logging()
+    # Загрузка моделей — секунды блокирующей работы: уводим в поток,
+    # чтобы event loop оставался свободен на время старта
+    pipeline = await asyncio.to_thread(get_pipeline)
+    # Прогревочный поиск: первый forward-pass эмбеддера лениво
+    # инициализирует внутренние буферы — пусть это случится здесь,
+    # а не на первом реальном запросе
+    await asyncio.to_thread(pipeline.retriever.search, "прогрев", 1)
     print("✅ Сервис готов к работе!")
     yield
+    _log_listener.stop()
     print("🛑 Сервис остановлен.")
 
 
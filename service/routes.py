@@ -6,13 +6,21 @@
 /health       — проверка здоровья сервиса
 """
 
+import asyncio
 import json
-import traceback
+import logging
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # fallback на stdlib json
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 
-from rag.pipeline import RAGPipeline
+from rag.pipeline import get_pipeline
 from rag.config import LLM_MODEL
 from service.schemas import (
     AskRequest,
@@ -21,19 +29,28 @@ from service.schemas import (
     SourceDocument,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
-# Pipeline инициализируется один раз при первом импорте роутов
-# (загрузка моделей, подключение к Qdrant)
-_pipeline: RAGPipeline | None = None
+# Pipeline — общий синглтон процесса (rag.pipeline.get_pipeline):
+# загрузка моделей и подключение к Qdrant происходят один раз
+
 
+def _dumps(obj) -> bytes:
+    """JSON → UTF-8 байты: orjson, если установлен (быстрее stdlib)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode()
 
-def get_pipeline() -> RAGPipeline:
-    global _pipeline
-    if _pipeline is None:
-        _pipeline = RAGPipeline()
-    return _pipeline
 
+# SSE-фреймы: постоянные части закодированы в байты один раз,
+# на токен остаётся escape + encode + склейка байтов
+_SSE_SOURCES_PREFIX = b"event: sources\ndata: "
+_SSE_TOKEN_PREFIX = b"event: token\ndata: "
+_SSE_ERROR_PREFIX = b"event: error\ndata: "
+_SSE_SUFFIX = b"\n\n"
+_SSE_DONE = b"event: done\ndata: [DONE]\n\n"
 
 
 @router.post(
@@ -52,12 +69,14 @@ async def ask(request: AskRequest):
             category=request.category,
         )
 
+        # model_construct: поля уже нужных типов (включая округлённый
+        # ретривером score) — пропускаем валидацию pydantic
         sources = [
-            SourceDocument(
+            SourceDocument.model_construct(
                 title=doc.title,
                 source_url=doc.source_url,
                 category=doc.category,
-                score=round(doc.score, 4),
+                score=doc.score,
                 match_type=doc.match_type,
             )
             for doc in response.sources
@@ -70,7 +89,7 @@ async def ask(request: AskRequest):
         )
 
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Ошибка обработки /ask")
         raise HTTPException(status_code=500, detail=f"Ошибка генерации ответа: {e}")
 
 
@@ -83,15 +102,16 @@ async def ask(request: AskRequest):
 async def ask_stream(request: AskRequest):
     """SSE-стриминг: сначала отправляет источники, потом токены ответа."""
 
-    def event_generator():
+    async def event_generator():
         try:
             pipeline = get_pipeline()
 
-            # 1. Поиск документов
-            docs = pipeline.retriever.search(
-                query=request.question,
-                top_k=request.top_k,
-                category=request.category,
+            # 1. Поиск документов — блокирующий, уводим в поток
+            docs = await asyncio.to_thread(
+                pipeline.retriever.search,
+                request.question,
+                request.top_k,
+                request.category,
             )
 
             # 2. Отправляем источники первым SSE-событием
@@ -100,30 +120,80 @@ async def ask_stream(request: AskRequest):
                     "title": doc.title,
                     "source_url": doc.source_url,
                     "category": doc.category,
-                    "score": round(doc.score, 4),
+                    "score": doc.score,  # округлён в Retriever.search
                     "match_type": doc.match_type,
                 }
                 for doc in docs
             ]
-            yield f"event: sources\ndata: {json.dumps(sources_data, ensure_ascii=False)}\n\n"
-
-            # 3. Формируем контекст и стримим ответ
-            context = pipeline.retriever.format_context(docs)
-            for token in pipeline.llm.ask_stream(
-                question=request.question,
-                context=context,
-            ):
-                # Экранируем переносы строк для SSE
-                escaped = token.replace("\n", "\\n")
-                yield f"event: token\ndata: {escaped}\n\n"
+            yield b"".join((_SSE_SOURCES_PREFIX, _dumps(sources_data), _SSE_SUFFIX))
+
+            # 3. Стриминг ответа. Блокирующий итератор LLM крутится в
+            # отдельном потоке-продюсере и кладёт токены в asyncio.Queue:
+            # event loop свободен между токенами и тянет другие запросы,
+            # а ограничение очереди даёт backpressure медленному клиенту.
+            # При разрыве соединения генератор отменяется в queue.get(),
+            # очередь никто не разбирает — поэтому продюсер ждёт put с
+            # таймаутом и проверяет флаг отмены, иначе он завис бы в
+            # .result() навсегда, удерживая поток и HTTP-стрим к LLM
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+            cancelled = threading.Event()
+
+            def put_from_producer(item) -> bool:
+                """put в очередь из потока; False — консюмер ушёл."""
+                future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+                while not cancelled.is_set():
+                    try:
+                        future.result(timeout=0.5)
+                        return True
+                    except TimeoutError:
+                        continue
+                    except Exception:
+                        return False  # event loop закрывается
+                future.cancel()
+                return False
+
+            def producer():
+                token_stream = None
+                try:
+                    context = pipeline.retriever.format_context(docs)
+                    token_stream = pipeline.llm.ask_stream(
+                        question=request.question,
+                        context=context,
+                    )
+                    for token in token_stream:
+                        if not put_from_producer(token):
+                            return
+                    put_from_producer(None)
+                except BaseException as e:  # доносим ошибку до консюмера
+                    put_from_producer(e)
+                finally:
+                    # закрывает HTTP-стрим к LLM и при отмене тоже
+                    if token_stream is not None:
+                        token_stream.close()
+
+            threading.Thread(target=producer, daemon=True).start()
+
+            try:
+                while True:
+                    token = await queue.get()
+                    if token is None:
+                        break
+                    if isinstance(token, BaseException):
+                        raise token
+                    # Экранируем переносы строк для SSE
+                    escaped = token.replace("\n", "\\n")
+                    yield b"".join((_SSE_TOKEN_PREFIX, escaped.encode(), _SSE_SUFFIX))
+            finally:
+                # выполняется и при CancelledError после разрыва клиента
+                cancelled.set()
 
             # 4. Сигнал завершения
-            yield "event: done\ndata: [DONE]\n\n"
+            yield _SSE_DONE
 
         except Exception as e:
-            traceback.print_exc()
-            error_msg = json.dumps({"error": str(e)}, ensure_ascii=False)
-            yield f"event: error\ndata: {error_msg}\n\n"
+            logger.exception("Ошибка обработки /ask/stream")
+            yield b"".join((_SSE_ERROR_PREFIX, _dumps({"error": str(e)}), _SSE_SUFFIX))
 
     return StreamingResponse(
         event_generator(),
@@ -138,24 +208,33 @@ async def ask_stream(request: AskRequest):
 
 # ── /health ──────────────────────────────────────────────────────────
 
+# Кеш результата пробы Qdrant: балансировщик дёргает /health ежесекундно,
+# RPC в Qdrant на каждый хит — бесполезная нагрузка. TTL 5 секунд.
+_HEALTH_TTL = 5.0
+_health_cache = {"ok": False, "ts": float("-inf")}
+
+
 @router.get(
     "/health",
     response_model=HealthResponse,
     summary="Проверка здоровья сервиса",
 )
 async def health():
-    """Проверяет, что сервис и Qdrant работают."""
-    qdrant_ok = False
-    try:
-        pipeline = get_pipeline()
-        # Простая проверка подключения к Qdrant
-        pipeline.retriever.client.get_collections()
-        qdrant_ok = True
-    except Exception:
-        pass
+    """Проверяет, что сервис и Qdrant работают (проба кешируется на 5 с)."""
+    now = time.monotonic()
+    if now - _health_cache["ts"] > _HEALTH_TTL:
+        qdrant_ok = False
+        try:
+            pipeline = get_pipeline()
+            # Простая проверка подключения к Qdrant
+            await asyncio.to_thread(pipeline.retriever.client.get_collections)
+            qdrant_ok = True
+        except Exception:
+            pass
+        _health_cache.update(ok=qdrant_ok, ts=now)
 
     return HealthResponse(
-        status="ok" if qdrant_ok else "degraded",
+        status="ok" if _health_cache["ok"] else "degraded",
         model=LLM_MODEL,
-        qdrant_connected=qdrant_ok,
+        qdrant_connected=_health_cache["ok"],
     )
@@ -4,15 +4,23 @@ Pydantic-модели запросов и ответов для FastAPI серв
 
 from typing import Literal
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 # ── Запросы ──────────────────────────────────────────────────────────
 
-VALID_CATEGORIES = {"main", "news", "people"}
+VALID_CATEGORIES = frozenset({"main", "news", "people"})
 
 class AskRequest(BaseModel):
     """Запрос к RAG-системе."""
+    # str_strip_whitespace стрипует строки Rust-валидатором pydantic,
+    # extra='ignore' не тратит время на сбор неизвестных полей
+    model_config = ConfigDict(
+        extra="ignore",
+        str_strip_whitespace=True,
+        validate_assignment=False,
+    )
+
     question: str = Field(
         ...,
         min_length=1,
@@ -38,10 +46,10 @@ class AskRequest(BaseModel):
         """Swagger UI отправляет 'string' как плейсхолдер — превращаем в None."""
         if v is None:
             return None
-        v = str(v).strip()
-        if not v or v not in VALID_CATEGORIES:
-            return None
-        return v
+        if not isinstance(v, str):  # обычный случай — str, без аллокации
+            v = str(v)
+        v = v.strip()
+        return v if v in VALID_CATEGORIES else None
 
 
 # ── Ответы ───────────────────────────────────────────────────────────
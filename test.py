@@ -2,6 +2,13 @@ import json
 import os
 import sys
 import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # fallback на stdlib json
 
 # Принудительно UTF-8, чтобы не падало на Windows cp1251
 sys.stdout.reconfigure(encoding='utf-8')
@@ -9,77 +16,119 @@ sys.stdout.reconfigure(encoding='utf-8')
 
 PARSED_DATA_DIR = 'data/cleaned/'
 
+# Один TextWrapper на весь прогон: textwrap.fill создаёт новый объект
+# (с компиляцией настроек) на каждый вызов
+_WRAPPER = textwrap.TextWrapper(width=100)
+
 
 def format_content(content, width=100):
     """Разбивает длинную строку content на читаемые абзацы."""
     # Разделяем по двойным пробелам или переносам (часто разделители в scraped тексте)
     # Убираем лишние пробелы
     content = content.replace('\\n', '\n').replace('\\t', ' ')
-    
+
     # Разбиваем на части по ключевым разделителям
     parts = [p.strip() for p in content.split('\\\\') if p.strip()]
-    
+
+    wrapper = _WRAPPER if width == _WRAPPER.width else textwrap.TextWrapper(width=width)
+
     lines = []
     for part in parts:
-        wrapped = textwrap.fill(part.strip(), width=width)
-        lines.append(wrapped)
-    
+        # Короткая строка без переносов и двойных пробелов влезает
+        # как есть (fill бы их схлопнул) — regex-обёртка не нужна
+        if (len(part) <= width and '\n' not in part
+                and '\t' not in part and '  ' not in part):
+            lines.append(part)
+        else:
+            lines.append(wrapper.fill(part))
+
     return '\n\n'.join(lines)
 
 
-def print_json_file(filepath):
-    """Читает JSON файл и выводит его содержимое в читаемом виде."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
+def format_file(filepath):
+    """
+    Читает JSON файл и возвращает (успех, готовый текстовый блок).
+
+    Ничего не печатает — блок собирается строкой, чтобы воркеры пула
+    процессов могли форматировать параллельно, а вывод оставался
+    последовательным в главном процессе.
+    """
+    try:
+        # Файл читается одним вызовом, парсится orjson (если установлен) —
+        # быстрее инкрементального json.load поверх текстового буфера
+        raw = Path(filepath).read_bytes()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except Exception as e:
+        return False, f'[ОШИБКА] при чтении {filepath}: {e}\n\n'
+
     rel_path = os.path.relpath(filepath, PARSED_DATA_DIR)
-    
-    print('=' * 110)
-    print(f'  ФАЙЛ: {rel_path}')
-    print('=' * 110)
-    
+
+    parts = []
+    parts.append('=' * 110)
+    parts.append(f'  ФАЙЛ: {rel_path}')
+    parts.append('=' * 110)
+
     if 'title' in data:
-        print(f'\n  [Заголовок]: {data["title"]}')
-    
+        parts.append(f'\n  [Заголовок]: {data["title"]}')
+
     if 'url' in data:
-        print(f'  [URL]: {data["url"]}')
-    
+        parts.append(f'  [URL]: {data["url"]}')
+
     if 'content' in data:
-        print(f'\n  [Содержимое]:')
-        print('-' * 110)
+        parts.append(f'\n  [Содержимое]:')
+        parts.append('-' * 110)
         formatted = format_content(data['content'])
         # Добавляем отступ для красоты
         for line in formatted.split('\n'):
-            print(f'    {line}')
-        print('-' * 110)
-    
+            parts.append(f'    {line}')
+        parts.append('-' * 110)
+
     # Выводим другие поля, если есть
     other_keys = [k for k in data.keys() if k not in ('url', 'title', 'content')]
     if other_keys:
-        print(f'\n  [Дополнительные поля]:')
+        parts.append(f'\n  [Дополнительные поля]:')
         for key in other_keys:
             value = data[key]
             if isinstance(value, str) and len(value) > 200:
                 value = value[:200] + '...'
-            print(f'    {key}: {value}')
-    
-    print('\n')
+            parts.append(f'    {key}: {value}')
+
+    parts.append('\n')
+    return True, '\n'.join(parts) + '\n'
+
+
+def iter_json_files(root):
+    """
+    Рекурсивный генератор путей к *.json через os.scandir.
+
+    scandir отдаёт тип записи без лишних stat-вызовов (в отличие от
+    os.walk); сортировка — в пределах каталога: сначала файлы текущего
+    каталога, затем подкаталоги — как обходил os.walk с sorted(files).
+    """
+    entries = sorted(os.scandir(root), key=lambda e: e.name)
+    subdirs = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            subdirs.append(entry.path)
+        elif entry.name.endswith('.json'):
+            yield entry.path
+    for subdir in subdirs:
+        yield from iter_json_files(subdir)
 
 
 def main():
     file_count = 0
-    
-    # Рекурсивно обходим все JSON файлы
-    for root, dirs, files in os.walk(PARSED_DATA_DIR):
-        for filename in sorted(files):
-            if filename.endswith('.json'):
-                filepath = os.path.join(root, filename)
-                try:
-                    print_json_file(filepath)
-                    file_count += 1
-                except Exception as e:
-                    print(f'[ОШИБКА] при чтении {filepath}: {e}\n')
-    
+    filepaths = list(iter_json_files(PARSED_DATA_DIR))
+
+    # Чтение и форматирование файлов — параллельно в пуле процессов
+    # (каждый блок независим), вывод — последовательно и в исходном
+    # порядке в главном процессе
+    with ProcessPoolExecutor() as executor:
+        for ok, block in executor.map(format_file, filepaths, chunksize=32):
+            sys.stdout.write(block)
+            if ok:
+                file_count += 1
+
     print(f'\nВсего обработано файлов: {file_count}')
 
 